@@ -1,15 +1,20 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, UpdateOne
 import os
+import sys
+import asyncio
+import hashlib
+import orjson
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional
-import uuid
 from datetime import datetime
 import random
+import time
 
 # AI agents
 from ai_agents.agents import AgentConfig, SearchAgent, ChatAgent
@@ -20,16 +25,24 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(mongo_url, maxPoolSize=100, w=1)
 db = client[os.environ['DB_NAME']]
 
 # AI agents init
 agent_config = AgentConfig()
 search_agent: Optional[SearchAgent] = None
 chat_agent: Optional[ChatAgent] = None
+warm_agents_on_startup = os.environ.get('WARM_AGENTS_ON_STARTUP', '0') == '1'
+_chat_lock = asyncio.Lock()
+_search_lock = asyncio.Lock()
+_agent_capabilities: Optional[dict] = None
 
 # Main app
-app = FastAPI(title="AI Agents API", description="Minimal AI Agents API with LangGraph and MCP support")
+app = FastAPI(
+    title="AI Agents API",
+    description="Minimal AI Agents API with LangGraph and MCP support",
+    default_response_class=ORJSONResponse
+)
 
 # API router
 api_router = APIRouter(prefix="/api")
@@ -37,7 +50,7 @@ api_router = APIRouter(prefix="/api")
 
 # Models
 class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: os.urandom(16).hex())
     client_name: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
@@ -77,7 +90,7 @@ class SearchResponse(BaseModel):
 
 # LLM Models for Hot-or-Not
 class LLMModel(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: os.urandom(16).hex())
     name: str
     provider: str
     description: str
@@ -90,14 +103,9 @@ class LLMModel(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     image_url: Optional[str] = None
 
-    def calculate_win_rate(self):
-        if self.total_votes == 0:
-            return 0.0
-        return round(self.wins / self.total_votes * 100, 1)
-
 
 class Vote(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: os.urandom(16).hex())
     winner_id: str
     loser_id: str
     voter_ip: Optional[str] = None
@@ -113,6 +121,141 @@ class VoteRequest(BaseModel):
     winner_id: str
     loser_id: str
 
+# Derive win_rate from wins/total_votes when reading models
+WIN_RATE_STAGE = {"$addFields": {
+    "win_rate": {"$cond": [
+        {"$gt": ["$total_votes", 0]},
+        {"$round": [{"$multiply": [{"$divide": ["$wins", "$total_votes"]}, 100]}, 1]},
+        0
+    ]}
+}}
+
+
+async def ensure_indexes():
+    # Indexes for model lookups by id, top-model sort and vote history
+    await asyncio.gather(
+        db.llm_models.create_index([("id", 1)], unique=True),
+        db.llm_models.create_index([("wins", -1)]),
+        db.votes.create_index([("timestamp", -1)])
+    )
+
+
+# LLM model cache (stale-while-revalidate)
+MODELS_CACHE_TTL = 5  # seconds
+# "data" holds {"models", "body", "etag"} so /models can reuse the encoded body
+_models_cache = {"data": None, "expires": 0, "task": None, "generation": 0, "drops": 0}
+_background_tasks = set()
+
+
+def _spawn_background(coro):
+    # Keep a strong reference until the task finishes
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+
+def _background_task_done(task):
+    _background_tasks.discard(task)
+    if not task.cancelled():
+        # Failures are logged by the task itself
+        task.exception()
+
+
+async def _refresh_models_cache():
+    # Reload model docs from MongoDB
+    try:
+        while True:
+            generation, drops = _models_cache["generation"], _models_cache["drops"]
+            cursor = await db.llm_models.aggregate([WIN_RATE_STAGE, {"$project": {"_id": 0}}])
+            models = await cursor.to_list(1000)
+
+            # Reseeded while reading: the docs may be gone, read again
+            if _models_cache["drops"] == drops:
+                break
+
+        # Never older than what is cached; stays stale if a vote landed meanwhile
+        body = orjson.dumps(models)
+        entry = {"models": models, "body": body, "etag": body_etag(body)}
+        _models_cache["data"] = entry
+        if _models_cache["generation"] == generation:
+            _models_cache["expires"] = time.monotonic() + MODELS_CACHE_TTL
+        return entry
+    except Exception as e:
+        logger.error(f"Failed to refresh models cache: {e}")
+        raise
+
+
+def _start_models_refresh():
+    # Single-flight: reuse the in-flight refresh task if there is one
+    task = _models_cache["task"]
+    if task is None or task.done():
+        task = _spawn_background(_refresh_models_cache())
+        _models_cache["task"] = task
+    return task
+
+
+async def get_models_entry() -> dict:
+    # Serve cached entry, refreshing in background once stale
+    entry = _models_cache["data"]
+    if entry is None:
+        # Shield so a cancelled request doesn't cancel the shared refresh
+        return await asyncio.shield(_start_models_refresh())
+
+    if time.monotonic() >= _models_cache["expires"]:
+        _start_models_refresh()
+    return entry
+
+
+async def get_models_cached() -> List[dict]:
+    # Cached model docs (no _id, win_rate derived)
+    return (await get_models_entry())["models"]
+
+
+def invalidate_models_cache(drop: bool = False):
+    # Mark cache stale; drop it when the model set itself changed
+    _models_cache["generation"] += 1
+    _models_cache["expires"] = 0
+    if drop:
+        _models_cache["drops"] += 1
+        _models_cache["data"] = None
+
+
+def body_etag(body: bytes) -> str:
+    return f'W/"{hashlib.md5(body).hexdigest()}"'
+
+
+def cacheable_response(request: Request, body: bytes, etag: Optional[str] = None) -> Response:
+    # ETag over the encoded body; no-cache makes clients revalidate every
+    # time so stats/leaderboard refresh right after a vote
+    etag = etag or body_etag(body)
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def get_chat_agent() -> ChatAgent:
+    # Build chat agent once; the lock only matters if init ever awaits
+    global chat_agent
+    if chat_agent is None:
+        async with _chat_lock:
+            if chat_agent is None:
+                chat_agent = ChatAgent(agent_config)
+    return chat_agent
+
+
+async def get_search_agent() -> SearchAgent:
+    # Build search agent once; the lock only matters if init ever awaits
+    global search_agent
+    if search_agent is None:
+        async with _search_lock:
+            if search_agent is None:
+                search_agent = SearchAgent(agent_config)
+    return search_agent
+
+
 # Routes
 @api_router.get("/")
 async def root():
@@ -120,9 +263,9 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
@@ -135,21 +278,12 @@ async def get_status_checks():
 @api_router.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(request: ChatRequest):
     # Chat with AI agent
-    global search_agent, chat_agent
-    
     try:
-        # Init agents if needed
-        if request.agent_type == "search" and search_agent is None:
-            search_agent = SearchAgent(agent_config)
-            
-        elif request.agent_type == "chat" and chat_agent is None:
-            chat_agent = ChatAgent(agent_config)
-        
-        # Select agent
-        agent = search_agent if request.agent_type == "search" else chat_agent
-        
-        if agent is None:
-            raise HTTPException(status_code=500, detail="Failed to initialize agent")
+        # Select agent, init if needed
+        if request.agent_type == "search":
+            agent = await get_search_agent()
+        else:
+            agent = await get_chat_agent()
         
         # Execute agent
         response = await agent.execute(request.message)
@@ -177,16 +311,13 @@ async def chat_with_agent(request: ChatRequest):
 @api_router.post("/search", response_model=SearchResponse)
 async def search_and_summarize(request: SearchRequest):
     # Web search with AI summary
-    global search_agent
-    
     try:
         # Init search agent if needed
-        if search_agent is None:
-            search_agent = SearchAgent(agent_config)
+        agent = await get_search_agent()
         
         # Search with agent
         search_prompt = f"Search for information about: {request.query}. Provide a comprehensive summary with key findings."
-        result = await search_agent.execute(search_prompt, use_tools=True)
+        result = await agent.execute(search_prompt, use_tools=True)
         
         if result.success:
             return SearchResponse(
@@ -218,15 +349,18 @@ async def search_and_summarize(request: SearchRequest):
 
 @api_router.get("/agents/capabilities")
 async def get_agent_capabilities():
-    # Get agent capabilities
+    # Get agent capabilities, computed once from the shared agents
+    global _agent_capabilities
+    
     try:
-        capabilities = {
-            "search_agent": SearchAgent(agent_config).get_capabilities(),
-            "chat_agent": ChatAgent(agent_config).get_capabilities()
-        }
+        if _agent_capabilities is None:
+            _agent_capabilities = {
+                "search_agent": (await get_search_agent()).get_capabilities(),
+                "chat_agent": (await get_chat_agent()).get_capabilities()
+            }
         return {
             "success": True,
-            "capabilities": capabilities
+            "capabilities": _agent_capabilities
         }
     except Exception as e:
         logger.error(f"Error getting capabilities: {e}")
@@ -311,22 +445,26 @@ async def seed_models():
         # Clear existing models
         await db.llm_models.drop()
 
-        # Insert new models
-        for model_data in models:
-            model = LLMModel(**model_data)
-            await db.llm_models.insert_one(model.dict())
+        # Insert new models in one batch, rebuilding indexes alongside
+        docs = [LLMModel(**model_data).model_dump() for model_data in models]
+        await asyncio.gather(
+            ensure_indexes(),
+            db.llm_models.insert_many(docs, ordered=False)
+        )
 
+        invalidate_models_cache(drop=True)
         return {"success": True, "message": f"Seeded {len(models)} LLM models"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @api_router.get("/models", response_model=List[LLMModel])
-async def get_all_models():
+async def get_all_models(request: Request):
     """Get all LLM models"""
     try:
-        models = await db.llm_models.find().to_list(1000)
-        return [LLMModel(**model) for model in models]
+        # Body and ETag are encoded once per cache refresh
+        entry = await get_models_entry()
+        return cacheable_response(request, entry["body"], entry["etag"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -335,17 +473,28 @@ async def get_all_models():
 async def get_battle():
     """Get a random battle between two LLM models"""
     try:
-        models = await db.llm_models.find().to_list(1000)
-        if len(models) < 2:
+        if _models_cache["data"] is not None:
+            # Select 2 random models from the warm cache
+            models = await get_models_cached()
+            selected_models = random.sample(models, 2) if len(models) >= 2 else models
+        else:
+            # Cold cache: let MongoDB pick 2 and warm the cache meanwhile
+            _start_models_refresh()
+            cursor = await db.llm_models.aggregate([
+                {"$sample": {"size": 2}},
+                WIN_RATE_STAGE,
+                {"$project": {"_id": 0}}
+            ])
+            selected_models = await cursor.to_list(2)
+
+        if len(selected_models) < 2:
             raise HTTPException(status_code=400, detail="Need at least 2 models to battle")
 
-        # Select 2 random models
-        selected_models = random.sample(models, 2)
-
-        return Battle(
-            model1=LLMModel(**selected_models[0]),
-            model2=LLMModel(**selected_models[1])
-        )
+        # Return the DB docs directly so response_model doesn't re-validate
+        return ORJSONResponse(content={
+            "model1": selected_models[0],
+            "model2": selected_models[1]
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -359,69 +508,65 @@ async def submit_vote(vote_request: VoteRequest):
             winner_id=vote_request.winner_id,
             loser_id=vote_request.loser_id
         )
-        await db.votes.insert_one(vote.dict())
 
-        # Update winner stats
-        winner_update = {
-            "$inc": {"total_votes": 1, "wins": 1}
-        }
-        await db.llm_models.update_one(
-            {"id": vote_request.winner_id},
-            winner_update
-        )
+        # Update winner and loser counters in one bulk round trip;
+        # win_rate is derived at read time (see WIN_RATE_STAGE)
+        stats_updates = [
+            UpdateOne(
+                {"id": vote_request.winner_id},
+                {"$inc": {"total_votes": 1, "wins": 1}}
+            ),
+            UpdateOne(
+                {"id": vote_request.loser_id},
+                {"$inc": {"total_votes": 1, "losses": 1}}
+            )
+        ]
 
-        # Update loser stats
-        loser_update = {
-            "$inc": {"total_votes": 1, "losses": 1}
-        }
-        await db.llm_models.update_one(
-            {"id": vote_request.loser_id},
-            loser_update
+        await asyncio.gather(
+            db.votes.insert_one(vote.model_dump()),
+            db.llm_models.bulk_write(stats_updates, ordered=False)
         )
 
-        # Recalculate win rates
-        for model_id in [vote_request.winner_id, vote_request.loser_id]:
-            model = await db.llm_models.find_one({"id": model_id})
-            if model:
-                model_obj = LLMModel(**model)
-                win_rate = model_obj.calculate_win_rate()
-                await db.llm_models.update_one(
-                    {"id": model_id},
-                    {"$set": {"win_rate": win_rate}}
-                )
-
+        invalidate_models_cache()
         return {"success": True, "message": "Vote recorded successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @api_router.get("/leaderboard", response_model=List[LLMModel])
-async def get_leaderboard():
+async def get_leaderboard(request: Request):
     """Get leaderboard sorted by win rate"""
     try:
-        models = await db.llm_models.find().sort([("wins", -1), ("win_rate", -1)]).to_list(1000)
-        return [LLMModel(**model) for model in models]
+        cursor = await db.llm_models.aggregate([
+            WIN_RATE_STAGE,
+            {"$sort": {"wins": -1, "win_rate": -1}},
+            {"$project": {"_id": 0}}
+        ])
+        models = await cursor.to_list(1000)
+        return cacheable_response(request, orjson.dumps(models))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @api_router.get("/stats")
-async def get_battle_stats():
+async def get_battle_stats(request: Request):
     """Get overall battle statistics"""
     try:
-        total_votes = await db.votes.count_documents({})
-        total_models = await db.llm_models.count_documents({})
-
-        # Get top model
-        top_models = await db.llm_models.find().sort([("wins", -1)]).limit(1).to_list(1)
-        top_model = LLMModel(**top_models[0]) if top_models else None
+        # Counts and top model are independent, fetch them together.
+        # Estimated counts come from collection metadata and may lag
+        # concurrent writes slightly, which is fine for a dashboard stat.
+        total_votes, total_models, top_models = await asyncio.gather(
+            db.votes.estimated_document_count(),
+            db.llm_models.estimated_document_count(),
+            db.llm_models.find({}, {"_id": 0, "name": 1}).sort([("wins", -1)]).limit(1).to_list(1)
+        )
 
-        return {
+        return cacheable_response(request, orjson.dumps({
             "total_votes": total_votes,
             "total_models": total_models,
-            "top_model": top_model.name if top_model else None,
+            "top_model": top_models[0]["name"] if top_models else None,
             "battles_completed": total_votes
-        }
+        }))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -444,13 +589,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def _warm_agents():
+    # Build agents off the request path
+    await asyncio.sleep(0)
+
+    try:
+        await get_chat_agent()
+        await get_search_agent()
+        logger.info("AI agents warmed up")
+    except Exception as e:
+        logger.error(f"Failed to warm up agents: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     # Initialize agents on startup
     global search_agent, chat_agent
     logger.info("Starting AI Agents API...")
+
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
     
-    # Lazy agent init for faster startup
+    # Lazy agent init for faster startup, optionally warmed in background
+    if warm_agents_on_startup:
+        _spawn_background(_warm_agents())
+
     logger.info("AI Agents API ready!")
 
 
@@ -464,5 +629,20 @@ async def shutdown_db_client():
         # MCP cleanup automatic
         pass
     
-    client.close()
+    await client.close()
     logger.info("AI Agents API shutdown complete.")
+
+
+if __name__ == "__main__":
+    # Production entrypoint: uvloop event loop, httptools parser, one worker per core.
+    # Caches are per worker process.
+    import uvicorn
+
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8001)),
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    )
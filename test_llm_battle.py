@@ -4,20 +4,18 @@ Test script for LLM Battle API
 Tests all the endpoints to ensure the hot-or-not website is working correctly
 """
 
-import requests
-import json
-import time
+import asyncio
+import httpx
 
 BASE_URL = "http://localhost:8001/api"
 
-def test_api_endpoint(endpoint, method="GET", data=None):
+async def test_api_endpoint(client, endpoint, method="GET", data=None):
     """Test an API endpoint"""
-    url = f"{BASE_URL}{endpoint}"
     try:
         if method == "GET":
-            response = requests.get(url)
+            response = await client.get(endpoint)
         elif method == "POST":
-            response = requests.post(url, json=data)
+            response = await client.post(endpoint, json=data)
 
         print(f"✅ {method} {endpoint}: {response.status_code}")
         if response.status_code == 200:
@@ -33,25 +31,51 @@ def test_api_endpoint(endpoint, method="GET", data=None):
         print(f"❌ {method} {endpoint}: Error - {e}")
         return None
 
-def main():
+async def test_etag_revalidation(client, endpoint, response):
+    """Send the received ETag back and expect 304 Not Modified"""
+    try:
+        assert response is not None and response.status_code == 200, "no initial response"
+        etag = response.headers.get("etag")
+        assert etag, "missing ETag header"
+
+        revalidated = await client.get(endpoint, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304, f"Expected 304, got {revalidated.status_code}"
+        print(f"✅ GET {endpoint} with If-None-Match: 304")
+    except Exception as e:
+        print(f"❌ GET {endpoint} with If-None-Match: {e}")
+
+async def main():
     print("🚀 Testing LLM Battle API...")
     print("=" * 50)
 
-    # Test 1: Basic API health
-    print("\n📡 Testing basic API health...")
-    test_api_endpoint("/")
+    # One keep-alive client; independent calls run concurrently
+    async with httpx.AsyncClient(base_url=BASE_URL) as client:
+        await run_tests(client)
 
-    # Test 2: Seed models
-    print("\n🌱 Seeding LLM models...")
-    test_api_endpoint("/models/seed", method="POST")
-
-    # Test 3: Get all models
-    print("\n🤖 Getting all models...")
-    models_response = test_api_endpoint("/models")
+    print("\n" + "=" * 50)
+    print("🎉 LLM Battle API testing complete!")
+    print("\n📱 Frontend should be available at: http://localhost:3000")
+    print("🔗 API documentation at: http://localhost:8001/docs")
 
-    # Test 4: Get battle
-    print("\n⚔️ Getting a battle...")
-    battle_response = test_api_endpoint("/battle")
+async def run_tests(client):
+    # Test 1 & 2: Basic API health and seed models
+    print("\n📡 Testing basic API health and 🌱 seeding LLM models...")
+    await asyncio.gather(
+        test_api_endpoint(client, "/"),
+        test_api_endpoint(client, "/models/seed", method="POST")
+    )
+
+    # Test 3 & 4: Get all models and a battle (stats kept for the vote check)
+    print("\n🤖 Getting all models and ⚔️ a battle...")
+    models_response, battle_response, stats_before = await asyncio.gather(
+        test_api_endpoint(client, "/models"),
+        test_api_endpoint(client, "/battle"),
+        test_api_endpoint(client, "/stats")
+    )
+
+    # Test 4b: Revalidate models with the received ETag
+    print("\n🏷️ Revalidating models with ETag...")
+    await test_etag_revalidation(client, "/models", models_response)
 
     if battle_response and battle_response.status_code == 200:
         battle_data = battle_response.json()
@@ -63,11 +87,14 @@ def main():
         # Test 5: Submit vote
         print("\n🗳️ Submitting a vote...")
         vote_data = {"winner_id": model1_id, "loser_id": model2_id}
-        test_api_endpoint("/vote", method="POST", data=vote_data)
+        await test_api_endpoint(client, "/vote", method="POST", data=vote_data)
 
-    # Test 6: Get leaderboard
-    print("\n🏆 Getting leaderboard...")
-    leaderboard_response = test_api_endpoint("/leaderboard")
+    # Test 6 & 7: Get leaderboard and stats
+    print("\n🏆 Getting leaderboard and 📊 battle stats...")
+    leaderboard_response, stats_response = await asyncio.gather(
+        test_api_endpoint(client, "/leaderboard"),
+        test_api_endpoint(client, "/stats")
+    )
 
     if leaderboard_response and leaderboard_response.status_code == 200:
         leaderboard = leaderboard_response.json()
@@ -75,20 +102,21 @@ def main():
             top_model = leaderboard[0]
             print(f"   Top model: {top_model['name']} with {top_model['wins']} wins")
 
-    # Test 7: Get stats
-    print("\n📊 Getting battle stats...")
-    stats_response = test_api_endpoint("/stats")
-
     if stats_response and stats_response.status_code == 200:
         stats = stats_response.json()
         print(f"   Total battles: {stats.get('battles_completed', 0)}")
         print(f"   Total models: {stats.get('total_models', 0)}")
         print(f"   Current champion: {stats.get('top_model', 'None')}")
 
-    print("\n" + "=" * 50)
-    print("🎉 LLM Battle API testing complete!")
-    print("\n📱 Frontend should be available at: http://localhost:3000")
-    print("🔗 API documentation at: http://localhost:8001/docs")
+        # Test 7b: Vote must show up in stats right away
+        voted = battle_response and battle_response.status_code == 200
+        if voted and stats_before and stats_before.status_code == 200:
+            try:
+                before = stats_before.json()["total_votes"]
+                assert stats["total_votes"] > before, f"total_votes stayed at {before}"
+                print(f"✅ Stats updated after vote: {before} -> {stats['total_votes']}")
+            except Exception as e:
+                print(f"❌ Stats not updated after vote: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file